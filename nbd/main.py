@@ -26,25 +26,35 @@ def main(options):
           sys.exit("Could not find the ps3 adapter usb device")
         try:
             with usb_device.claimInterface(0):
-                reader = PlayStationMemoryCardReader(usb_device, authenticator)
+                reader = PlayStationMemoryCardReader(usb_device, authenticator,
+                  usb_context, batch_page_read=options.batch_page_read)
                 print('Waiting for client...')
                 epoll = select.epoll()
                 def accept():
                     (nbd_client_sock, addr) = nbd_sock.accept()
                     fileno = nbd_client_sock.fileno()
                     print('Client connected %s:%i' % addr)
+                    # Card may have been changed since previous connection.
+                    reader.invalidateCardType()
                     nbd_server = NBDServer(sock=nbd_client_sock, device=reader)
                     if nbd_server.greet():
                         socket_dict[fileno] = nbd_server
-                        handler_dict[nbd_server] = nbd_server.handle
+                        handler_dict[nbd_server] = partial(handle, nbd_server,
+                          fileno)
                         epoll.register(
                             fileno,
                             select.EPOLLIN | select.EPOLLHUP,
                         )
-                def handle(nbd_server):
+                def handle(nbd_server, fileno):
+                    # fileno is the one saved at accept time, as a closed
+                    # socket reports -1.
                     if not nbd_server.handle():
-                        epoll.unregister(nbd_server.fileno())
-                        del socket_dict[nbd_server.fileno()]
+                        try:
+                            epoll.unregister(fileno)
+                        except OSError:
+                            # Already closed, so already gone from epoll.
+                            pass
+                        del socket_dict[fileno]
                         del handler_dict[nbd_server]
 
                 socket_dict = {
@@ -61,8 +71,11 @@ def main(options):
                         if event == select.EPOLLIN:
                             handler_dict[sock]()
                         else:
-                            epoll.unregister(sock.fileno())
-                            del socket_dict[sock.fileno()]
+                            try:
+                                epoll.unregister(fd)
+                            except OSError:
+                                pass
+                            del socket_dict[fd]
                             del handler_dict[sock]
                             sock.close()
         except KeyboardInterrupt:
@@ -89,6 +102,10 @@ if __name__ == '__main__':
     parser.add_option('-r', '--auth-cache-read-only', default=False,
       action='store_true',
       help='Don\'t store authentication information generated during this run.')
+    parser.add_option('-b', '--batch-page-read', default=False,
+      action='store_true',
+      help='Send several PS2 page read commands at once (experimental, ' \
+      'depends on card reader firmware).')
     parser.add_option('-P', '--auth-port', default=20531, type='int',
       help='Port used to contact authentication daemon.')
     parser.add_option('-A', '--auth-address', default='127.0.0.1',
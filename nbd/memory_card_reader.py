@@ -1,4 +1,10 @@
-from struct import pack, unpack
+from binascii import hexlify
+from io import BytesIO
+import logging
+from struct import Struct
+import usb1
+
+_log = logging.getLogger(__name__)
 
 BULK_WRITE_ENDPOINT = 0x2
 BULK_READ_ENDPOINT = 0x1
@@ -7,12 +13,22 @@ BULK_READ_LENGTH = 64
 COMMAND_CODE = b'\xaa'
 COMMAND_TYPE_LONG = b'\x42'
 
-RESPONSE_CODE = b'\x55'
-RESPONSE_STATUS_SUCCES = b'\x5a'
+RESPONSE_CODE = 0x55
+RESPONSE_STATUS_SUCCES = 0x5a
 
 PS2_CARD_TYPE = 2
 PAGE_LENGTH = 0x210 # PS2
 PS2_CARD_SIZE = 0x840210
+# Response code, status & length bytes followed by page data
+PAGE_RESPONSE_CHUNK_COUNT = -(-(4 + PAGE_LENGTH) // BULK_READ_LENGTH)
+# Asynchronous bulk reads, for all page response chunks but the first one
+TRANSFER_POOL_SIZE = PAGE_RESPONSE_CHUNK_COUNT - 1
+# Maximum number of page read commands sent in a single bulk write
+PAGE_READ_BATCH_SIZE = 8
+
+# Number of PS2 page accesses trusting a successful authentication before
+# asking the card reader again, in case it timed out on device side.
+AUTH_CHECK_INTERVAL = 1000
 
 PS1_CARD_TYPE = 1
 FRAME_LENGTH = 0x80 # PS1
@@ -20,6 +36,15 @@ PS1_CARD_SIZE = 0x20000
 
 PS1_COMMAND_TAIL = b'\x00' * 0x86 # 0x36 + 0x40 + 0x16
 
+AUTH_DATA_LENGTH = 9
+
+_PACK_LE_H = Struct('<h') # Long command & response length
+_PACK_LE_I = Struct('<I') # PS2 page number
+_PACK_BE_H = Struct('>H') # PS1 frame number
+_PACK_S_B = Struct('b') # 81f0 sequence number
+
+_LONG_COMMAND_PREFIX = COMMAND_CODE + COMMAND_TYPE_LONG
+
 CARD_SIZE_DICT = {
     PS1_CARD_TYPE: PS1_CARD_SIZE,
     PS2_CARD_TYPE: PS2_CARD_SIZE,
@@ -31,20 +56,130 @@ CARD_PAGE_DICT = {
 }
 
 def hexdump(data):
-    return ' '.join('%02x' % x for x in data)
+    return hexlify(data, ' ').decode('ascii')
 
 def _padCommand(command, padding=2):
     return command + b'\x00' * padding
 
 def _stripResponse(response, padding=2):
-    stuffing = response[:-padding]
-    assert stuffing == b'\xff' * len(stuffing), hexdump(stuffing)
-    return response[-padding:]
+    stuffing_length = len(response) - padding
+    assert response.count(b'\xff', 0, stuffing_length) == stuffing_length, \
+      hexdump(response[:stuffing_length])
+    return response[stuffing_length:]
+
+def _longCommand(data):
+    length = len(data)
+    result = bytearray(4 + length)
+    result[:2] = _LONG_COMMAND_PREFIX
+    _PACK_LE_H.pack_into(result, 2, length)
+    result[4:] = data
+    return result
+
+# Block commands, serialised once with a null address (and null data for
+# writes). Block data immediately follows address.
+_READ_FRAME_COMMAND = bytes(_longCommand(b'\x81\x52\x00\x00' + b'\x00\x00' + \
+  PS1_COMMAND_TAIL))
+_READ_FRAME_ADDRESS_OFFSET = 8
+# XXX: the \x00 before the tail seems to be some kind of checksum, but data
+# seems written even without computing it.
+_WRITE_FRAME_COMMAND = bytes(_longCommand(b'\x81\x57\x5a\x5d' + b'\x00' * (
+  2 + FRAME_LENGTH) + b'\x00\x5c\x5d\x47'))
+_WRITE_FRAME_ADDRESS_OFFSET = 8
+_READ_PAGE_COMMAND = COMMAND_CODE + b'\x52\x03' + b'\x00' * 4 + b'\x55\x2b'
+_READ_PAGE_ADDRESS_OFFSET = 3
+_WRITE_PAGE_COMMAND = COMMAND_CODE + b'\x57\x03' + b'\x00' * (
+  4 + PAGE_LENGTH) + b'\x55\x2b'
+_WRITE_PAGE_ADDRESS_OFFSET = 3
+
+def _readFrameCommand(frame_number):
+    result = bytearray(_READ_FRAME_COMMAND)
+    _PACK_BE_H.pack_into(result, _READ_FRAME_ADDRESS_OFFSET, frame_number)
+    return result
+
+def _writeFrameCommand(frame_number, data):
+    result = bytearray(_WRITE_FRAME_COMMAND)
+    _PACK_BE_H.pack_into(result, _WRITE_FRAME_ADDRESS_OFFSET, frame_number)
+    data_offset = _WRITE_FRAME_ADDRESS_OFFSET + _PACK_BE_H.size
+    result[data_offset:data_offset + FRAME_LENGTH] = data
+    return result
+
+def _readPageCommand(page_number):
+    result = bytearray(_READ_PAGE_COMMAND)
+    _PACK_LE_I.pack_into(result, _READ_PAGE_ADDRESS_OFFSET, page_number)
+    return result
+
+def _writePageCommand(page_number, data):
+    result = bytearray(_WRITE_PAGE_COMMAND)
+    _PACK_LE_I.pack_into(result, _WRITE_PAGE_ADDRESS_OFFSET, page_number)
+    data_offset = _WRITE_PAGE_ADDRESS_OFFSET + _PACK_LE_I.size
+    result[data_offset:data_offset + PAGE_LENGTH] = data
+    return result
+
+# Fixed commands, serialised once.
+_CMD_8111 = bytes(_longCommand(_padCommand(b'\x81\x11')))
+_CMD_8128 = bytes(_longCommand(_padCommand(b'\x81\x28', padding=3)))
+_CMD_8127 = bytes(_longCommand(_padCommand(b'\x81\x27\x55')))
+_CMD_8126 = bytes(_longCommand(_padCommand(b'\x81\x26', padding=11)))
+_CMD_8158 = bytes(_longCommand(b'\x81\x58\x00\x00\x00'))
+_CMD_81F3 = bytes(_longCommand(_padCommand(b'\x81\xf3\x00')))
+_CMD_81F7 = bytes(_longCommand(_padCommand(b'\x81\xf7\x01')))
+# 81f0 commands, for all sequence numbers used during authentication.
+_81F0_SEQ_NUMBERS = range(0x15)
+_CMD_81F0_DICT = {
+    x: bytes(_longCommand(_padCommand(b'\x81\xf0' + _PACK_S_B.pack(x))))
+    for x in _81F0_SEQ_NUMBERS
+}
+_CMD_RECV_81F0_DICT = {
+    x: bytes(_longCommand(_padCommand(b'\x81\xf0' + _PACK_S_B.pack(x),
+      padding=AUTH_DATA_LENGTH + 2)))
+    for x in _81F0_SEQ_NUMBERS
+}
+# Followed by AUTH_DATA_LENGTH bytes of data and 2 bytes of padding.
+_CMD_SEND_81F0_PREFIX_DICT = {
+    x: _LONG_COMMAND_PREFIX + _PACK_LE_H.pack(
+      3 + AUTH_DATA_LENGTH + 2) + b'\x81\xf0' + _PACK_S_B.pack(x)
+    for x in _81F0_SEQ_NUMBERS
+}
 
 class PlayStationMemoryCardReader(object):
-    def __init__(self, usb_device, authenticator):
+    def __init__(self, usb_device, authenticator, usb_context=None,
+          batch_page_read=False):
+        """
+          usb_device (USBDeviceHandle)
+            Opened card reader, with interface 0 claimed.
+          authenticator
+            Instance providing PS2 authentication answers (see authenticate).
+          usb_context (USBContext, or None)
+            Context usb_device belongs to. When given, page reads queue all
+            their bulk reads at once using asynchronous transfers, instead of
+            waiting for each 64-byte chunk before requesting the next one.
+          batch_page_read (bool)
+            Whether read should send consecutive PS2 page read commands in a
+            single bulk write (see readPages). Experimental: this relies on card
+            reader firmware queuing commands, which is not verified.
+        """
         self._usb_device = usb_device
         self._authenticator = authenticator
+        self._usb_context = usb_context
+        self._card_type = None
+        self._authenticated_countdown = 0
+        self._io_profile_dict = {
+            PS1_CARD_TYPE: (self.readFrame, None, self.writeFrame,
+              FRAME_LENGTH, PS1_CARD_SIZE),
+            PS2_CARD_TYPE: (self.readPage,
+              self.readPages if batch_page_read else None, self.writePage,
+              PAGE_LENGTH, PS2_CARD_SIZE),
+        }
+        if usb_context is None:
+            self._transfer_list = None
+        else:
+            self._transfer_list = transfer_list = []
+            for _ in range(TRANSFER_POOL_SIZE):
+                transfer = usb_device.getTransfer()
+                # Unlike bulkRead, setBulk does not set endpoint direction.
+                transfer.setBulk(BULK_READ_ENDPOINT | usb1.ENDPOINT_IN,
+                  BULK_READ_LENGTH)
+                transfer_list.append(transfer)
 
     # Read/write command helpers
     def _usbRead(self):
@@ -52,30 +187,87 @@ class PlayStationMemoryCardReader(object):
         #print '<', hexdump(result)
         return result
 
-    def _responseRead(self):
-        result = self._usbRead()
-        if result[0:1] != RESPONSE_CODE:
+    def _responseRead(self, read=None):
+        result = (read or self._usbRead)()
+        if result[0] != RESPONSE_CODE:
             raise ValueError('Received data is not a valid response: %s' % (
               hexdump(result), ))
-        return result[1:]
-
-    def _longResponseRead(self):
-        result = []
-        append = result.append
-        response = self._responseRead()
-        response_code = response[0:1]
+        # memoryview: callers parse response in place, without slice copies.
+        return memoryview(result)[1:]
+
+    def _longResponseRead(self, read=None):
+        if read is None:
+            read = self._usbRead
+        buf = BytesIO()
+        write = buf.write
+        response = self._responseRead(read)
+        response_code = response[0]
         if response_code == RESPONSE_STATUS_SUCCES:
-            response_length = unpack('<h', response[1:3])[0]
-            data = response[3:]
-            data_length = len(data)
-            append(data)
+            response_length = _PACK_LE_H.unpack_from(response, 1)[0]
+            data_length = write(response[3:])
             while data_length < response_length:
-                response = self._usbRead()
-                data_length += len(response)
-                append(response)
-        return response_code, b''.join(result)
+                data_length += write(read())
+        return response_code, buf.getvalue()
+
+    def _pipelinedLongResponseRead(self):
+        """
+          Same as _longResponseRead, but once the first chunk tells response
+          length, all remaining bulk reads are submitted at once, so the host
+          controller chains them without a round-trip to python between
+          chunks.
+          Only as many reads as the response needs are submitted, so chunks
+          of a following response (ex: batched page reads) are never consumed.
+          Should the pool be too small, remaining chunks are read
+          synchronously.
+        """
+        handleEvents = self._usb_context.handleEvents
+        first_chunk = self._usbRead()
+        transfer_list = []
+        def iterChunks():
+            yield first_chunk
+            for transfer in transfer_list:
+                while transfer.isSubmitted():
+                    handleEvents()
+                status = transfer.getStatus()
+                if status != usb1.TRANSFER_COMPLETED:
+                    raise IOError('Bulk read failed with transfer status %i' % (
+                      status, ))
+                # Only valid until transfer is resubmitted, which is fine as
+                # _longResponseRead consumes each chunk before reading the
+                # next.
+                yield memoryview(transfer.getBuffer())[
+                  :transfer.getActualLength()]
+        chunk_iter = iterChunks()
+        def read():
+            chunk = next(chunk_iter, None)
+            if chunk is None:
+                chunk = self._usbRead()
+            return chunk
+        try:
+            if len(first_chunk) >= 4 and first_chunk[0] == RESPONSE_CODE and \
+                  first_chunk[1] == RESPONSE_STATUS_SUCCES:
+                remaining = _PACK_LE_H.unpack_from(first_chunk, 2)[0] - (
+                  len(first_chunk) - 4)
+                for transfer in self._transfer_list[
+                      :-(-remaining // BULK_READ_LENGTH)]:
+                    transfer.submit()
+                    transfer_list.append(transfer)
+            return self._longResponseRead(read)
+        finally:
+            # Only transfers actually submitted, should a submit have failed.
+            for transfer in transfer_list:
+                if transfer.isSubmitted():
+                    try:
+                        transfer.cancel()
+                    except usb1.USBErrorNotFound:
+                        # Already completed, but not reaped yet.
+                        pass
+                while transfer.isSubmitted():
+                    handleEvents()
 
     def _usbWrite(self, data):
+        # Anything else gets converted item by item by libusb1.
+        assert isinstance(data, (bytes, bytearray)), type(data)
         #print '>', hexdump(data)
         self._usb_device.bulkWrite(BULK_WRITE_ENDPOINT, data)
 
@@ -83,7 +275,7 @@ class PlayStationMemoryCardReader(object):
         self._usbWrite(COMMAND_CODE + data)
 
     def _longCommandWrite(self, data):
-        self._commandWrite(COMMAND_TYPE_LONG + pack('<h', len(data)) + data)
+        self._usbWrite(_longCommand(data))
 
     # Identified commands
     def getCardType(self):
@@ -98,19 +290,40 @@ class PlayStationMemoryCardReader(object):
         assert len(response) == 1, hexdump(response)
         return response[0]
 
+    @property
+    def cardType(self):
+        """
+          Same as getCardType, but only query the card reader until a card is
+          found. Call invalidateCardType when the card might have changed.
+          Block access failures call it, as they may be caused by a card
+          change.
+        """
+        card_type = self._card_type
+        if card_type is None:
+            card_type = self.getCardType()
+            if card_type:
+                self._card_type = card_type
+        return card_type
+
+    def invalidateCardType(self):
+        """
+          Forget card type, so it gets queried again on next access.
+        """
+        self._card_type = None
+
     def isAuthenticated(self):
         """
           Return values:
             False: Card reader is in limited mode (PS1 cards only).
             True: Card reader allows full access (PS1 & PS2 card access).
         """
-        self._longCommandWrite(_padCommand(b'\x81\x11'))
+        self._usbWrite(_CMD_8111)
         response_code, data = self._longResponseRead()
-        if response_code == b'\xaf':
+        if response_code == 0xaf:
             result = False
         else:
-            assert response_code == RESPONSE_STATUS_SUCCES, hexdump(
-              response_code)
+            assert response_code == RESPONSE_STATUS_SUCCES, '%02x' % (
+              response_code, )
             response = _stripResponse(data)
             assert response == b'\x2b\x55', hexdump(response)
             result = True
@@ -123,11 +336,14 @@ class PlayStationMemoryCardReader(object):
         """
         # TODO:
         # - check frame number
-        encoded_frame_number = pack('>H', frame_number)
-        self._longCommandWrite(b'\x81\x52\x00\x00' + \
-          encoded_frame_number + PS1_COMMAND_TAIL)
-        response_code, data = self._longResponseRead()
-        assert response_code == RESPONSE_STATUS_SUCCES, hexdump(response_code)
+        try:
+            self._usbWrite(_readFrameCommand(frame_number))
+            response_code, data = self._longResponseRead()
+            assert response_code == RESPONSE_STATUS_SUCCES, '%02x' % (
+              response_code, )
+        except Exception:
+            self.invalidateCardType()
+            raise
         #data_header = data[:0xa]
         #assert data_header == b'\xff\x00\x5a\x5d\x00\x00\x5c\x5d' + \
         #  encoded_frame_number, hexdump(data_header)
@@ -145,23 +361,21 @@ class PlayStationMemoryCardReader(object):
         assert len(data) == FRAME_LENGTH
         # TODO:
         # - check frame number
-        encoded_frame_number = pack('>H', frame_number)
-        self._longCommandWrite(''.join((
-          b'\x81\x57\x5a\x5d',
-          encoded_frame_number,
-          data,
-          b'\x00', # XXX: seems to be some kind of checksum, but data seems written
-                   # even without computing it
-          b'\x5c\x5d\x47',
-        )))
-        response_code, response_data = self._longResponseRead()
-        assert response_code == RESPONSE_STATUS_SUCCES, hexdump(response_code)
-        assert response_data[:4] == b'\xff\x00\x5a\x5d',  hexdump(response_data[:4])
-        assert response_data[4] == 0x00, hexdump(response_data[4:5])
-        assert response_data[5:7] == encoded_frame_number, \
-          hexdump(response_data[5:6])
-        assert response_data[7:-3] == data, (hexdump(response_data[7:-3]), \
-          hexdump(data))
+        try:
+            self._usbWrite(_writeFrameCommand(frame_number, data))
+            response_code, response_data = self._longResponseRead()
+            assert response_code == RESPONSE_STATUS_SUCCES, '%02x' % (
+              response_code, )
+            assert response_data[:4] == b'\xff\x00\x5a\x5d', hexdump(
+              response_data[:4])
+            assert response_data[4] == 0x00, hexdump(response_data[4:5])
+            assert _PACK_BE_H.unpack_from(response_data, 5)[0] == \
+              frame_number, hexdump(response_data[5:6])
+            assert response_data[7:-3] == data, (hexdump(
+              response_data[7:-3]), hexdump(data))
+        except Exception:
+            self.invalidateCardType()
+            raise
         # XXX: the last byte of response changes from refernce dumps.
         # This is probably because of the incorrect checksum.
         #assert response_data[-3:] == '\x5c\x5d\x47', hexdump(
@@ -174,12 +388,55 @@ class PlayStationMemoryCardReader(object):
         """
         # TODO:
         # - check page number
+        return self._pageCommand(_readPageCommand(page_number),
+          self._readPageResponse)
+
+    def readPages(self, page_number, count):
+        """
+          Read <count> consecutive pages from PS2 card, starting at
+          <page_number>.
+          All read commands are sent in a single bulk write, then responses
+          are read back to back.
+          On failure, responses to the remaining commands of the batch are
+          read and discarded before raising, so they are not mistaken for
+          responses to later commands. Should this fail too, card reader state
+          is unknown and it should be replugged.
+        """
         self.authenticate()
-        self._commandWrite(b'\x52\x03' + pack('<I', page_number) + b'\x55\x2b')
-        response_code, data = self._longResponseRead()
-        assert response_code == RESPONSE_STATUS_SUCCES, hexdump(response_code)
-        assert len(data) == PAGE_LENGTH, '%i: %s' % (len(data), hexdump(data))
-        return data
+        result = bytearray(count * PAGE_LENGTH)
+        result_view = memoryview(result)
+        pending = 0
+        try:
+            self._usbWrite(b''.join([_readPageCommand(x)
+              for x in range(page_number, page_number + count)]))
+            pending = count
+            for offset in range(0, len(result), PAGE_LENGTH):
+                pending -= 1
+                response_code, data = self._readPageResponse()
+                if response_code != RESPONSE_STATUS_SUCCES:
+                    raise ValueError('Page read failed with status %02x' % (
+                      response_code, ))
+                result_view[offset:offset + PAGE_LENGTH] = data
+        except Exception:
+            self.invalidateAuthentication()
+            self.invalidateCardType()
+            for _ in range(pending):
+                self._longResponseRead()
+            raise
+        return result
+
+    def _readPageResponse(self):
+        """
+          Return (response status, page data).
+        """
+        if self._transfer_list is None:
+            response_code, data = self._longResponseRead()
+        else:
+            response_code, data = self._pipelinedLongResponseRead()
+        if response_code == RESPONSE_STATUS_SUCCES and len(data) != PAGE_LENGTH:
+            raise ValueError('Unexpected page length %i: %s' % (len(data),
+              hexdump(data)))
+        return response_code, data
 
     def writePage(self, page_number, data):
         """
@@ -188,16 +445,48 @@ class PlayStationMemoryCardReader(object):
         assert len(data) == PAGE_LENGTH
         # TODO:
         # - check page number
-        self.authenticate()
-        self._commandWrite(''.join((
-          b'\x57\x03',
-          pack('<I', page_number),
-          data,
-          b'\x55\x2b'
-        )))
+        self._pageCommand(_writePageCommand(page_number, data),
+          self._writePageResponse)
+
+    def _writePageResponse(self):
+        """
+          Return (response status, None).
+        """
         response = self._responseRead()
-        assert len(response) == 1, hexdump(response)
-        assert response == RESPONSE_STATUS_SUCCES, hexdump(response)
+        if len(response) != 1:
+            raise ValueError('Unexpected page write response: %s' % (
+              hexdump(response), ))
+        return response[0], None
+
+    def _pageCommand(self, command, readResponse):
+        """
+          Send a PS2 page command and return data from readResponse, which
+          must return a (status, data) tuple.
+          Card reader may have lost authentication since it was last checked
+          (device-side timeout, card reinserted...), so when it refuses the
+          command, authenticate again and retry once before giving up.
+          Other failures (transfer errors, malformed responses) are not
+          retried, as part of the response may still be pending on device
+          side.
+        """
+        for retry in (True, False):
+            self.authenticate()
+            try:
+                self._usbWrite(command)
+                status, data = readResponse()
+            except Exception:
+                self.invalidateAuthentication()
+                self.invalidateCardType()
+                raise
+            if status == RESPONSE_STATUS_SUCCES:
+                return data
+            self.invalidateAuthentication()
+            self.invalidateCardType()
+            if not retry:
+                raise ValueError('Page command failed with status %02x' % (
+                  status, ))
+            _log.warning('Page command failed with status %02x, retrying...',
+              status)
 
     def getRandomNumber(self, seq_number=4):
         """
@@ -206,7 +495,7 @@ class PlayStationMemoryCardReader(object):
           prove it is an authorised host. This job must be done by authenticator
           instance given at construction time.
         """
-        return self.__recv_81f0(seq_number, 9)
+        return self.__recv_81f0(seq_number)
 
     def sendAuthPart1(self, data, seq_number=6):
         self.__send_81f0(seq_number, data)
@@ -218,17 +507,17 @@ class PlayStationMemoryCardReader(object):
         self.__send_81f0(seq_number, data)
 
     def recvAuthPart1(self, seq_number=0xf):
-        return self.__recv_81f0(seq_number, 9)
+        return self.__recv_81f0(seq_number)
 
     def recvAuthPart2(self, seq_number=0x11):
-        return self.__recv_81f0(seq_number, 9)
+        return self.__recv_81f0(seq_number)
 
     def recvAuthPart3(self, seq_number=0x13):
-        return self.__recv_81f0(seq_number, 9)
+        return self.__recv_81f0(seq_number)
 
     # Generic & unidentified commands
     def __81f0(self, seq_number):
-        self._longCommandWrite(_padCommand(b'\x81\xf0' + pack('b', seq_number)))
+        self._usbWrite(_CMD_81F0_DICT[seq_number])
         response_code, data = self._longResponseRead()
         result = response_code == RESPONSE_STATUS_SUCCES
         if result:
@@ -236,101 +525,131 @@ class PlayStationMemoryCardReader(object):
             assert response == b'\x2b\xff', hexdump(response)
         return result
 
-    def __recv_81f0(self, seq_number, length):
-        padding = length + 2
-        self._longCommandWrite(_padCommand(b'\x81\xf0' + pack('b', seq_number),
-          padding=padding))
+    def __recv_81f0(self, seq_number):
+        padding = AUTH_DATA_LENGTH + 2
+        self._usbWrite(_CMD_RECV_81F0_DICT[seq_number])
         response_code, data = self._longResponseRead()
-        assert response_code == RESPONSE_STATUS_SUCCES, hexdump(response_code)
+        assert response_code == RESPONSE_STATUS_SUCCES, '%02x' % response_code
         response = _stripResponse(data, padding)
         assert response[0] == 0x2b and response[-1] == 0xff, hexdump(
           response)
         return response[1:-1]
 
     def __send_81f0(self, seq_number, data):
-        assert len(data) == 9, hexdump(data)
-        self._longCommandWrite(_padCommand(b'\x81\xf0' + pack('b',
-          seq_number) + data))
+        assert len(data) == AUTH_DATA_LENGTH, hexdump(data)
+        self._usbWrite(_padCommand(_CMD_SEND_81F0_PREFIX_DICT[seq_number] + \
+          data))
         response_code, data = self._longResponseRead()
-        assert response_code == RESPONSE_STATUS_SUCCES, hexdump(response_code)
+        assert response_code == RESPONSE_STATUS_SUCCES, '%02x' % response_code
         response = _stripResponse(data)
         assert response == b'\x2b\xff', hexdump(response)
 
     def __8128(self):
-        self._longCommandWrite(_padCommand(b'\x81\x28', padding=3))
+        self._usbWrite(_CMD_8128)
         response_code, data = self._longResponseRead()
-        assert response_code == RESPONSE_STATUS_SUCCES, hexdump(response_code)
+        assert response_code == RESPONSE_STATUS_SUCCES, '%02x' % response_code
         response = _stripResponse(data, padding=3)
         assert response == b'\x2b\xff\xff', hexdump(response)
 
     def __8127(self):
-        self._longCommandWrite(_padCommand(b'\x81\x27\x55'))
+        self._usbWrite(_CMD_8127)
         response_code, data = self._longResponseRead()
-        assert response_code == RESPONSE_STATUS_SUCCES, hexdump(response_code)
+        assert response_code == RESPONSE_STATUS_SUCCES, '%02x' % response_code
         response = _stripResponse(data)
         assert response == b'\x2b\x55', hexdump(response)
 
     def __8126(self):
-        self._longCommandWrite(_padCommand(b'\x81\x26', padding=11))
+        self._usbWrite(_CMD_8126)
         response_code, data = self._longResponseRead()
-        assert response_code == RESPONSE_STATUS_SUCCES, hexdump(response_code)
+        assert response_code == RESPONSE_STATUS_SUCCES, '%02x' % response_code
         response = _stripResponse(data, padding=11)
         assert response[0] == 0x2b and response[-1] == 0x55, hexdump(
           response)
         return response[1:-1]
 
     def __8158(self):
-        self._longCommandWrite(b'\x81\x58\x00\x00\x00')
+        self._usbWrite(_CMD_8158)
         response_code, data = self._longResponseRead()
-        assert response_code == b'\xaf', hexdump(response_code)
+        assert response_code == 0xaf, '%02x' % response_code
 
     def __81f3(self):
-        self._longCommandWrite(_padCommand(b'\x81\xf3\x00'))
+        self._usbWrite(_CMD_81F3)
         response_code, data = self._longResponseRead()
-        assert response_code == RESPONSE_STATUS_SUCCES, hexdump(response_code)
+        assert response_code == RESPONSE_STATUS_SUCCES, '%02x' % response_code
         response = _stripResponse(data)
         assert response == b'\x2b\xff', hexdump(response)
 
     def __81f7(self):
-        self._longCommandWrite(_padCommand(b'\x81\xf7\x01'))
+        self._usbWrite(_CMD_81F7)
         response_code, data = self._longResponseRead()
-        assert response_code == RESPONSE_STATUS_SUCCES, hexdump(response_code)
+        assert response_code == RESPONSE_STATUS_SUCCES, '%02x' % response_code
         response = _stripResponse(data)
         assert response == b'\x2b\xff', hexdump(response)
 
     # IO helpers
+    def _getIOProfile(self):
+        """
+          Return (read, read multiple or None, write, block length, card size)
+          for current card.
+        """
+        card_type = self.cardType
+        try:
+            return self._io_profile_dict[card_type]
+        except KeyError:
+            raise ValueError('No/unknown card (%02x)' % (card_type, ))
+
     def read(self, offset, length):
         """
           Read data starting at <offset> bytes for <length> bytes.
 
           offset & length can be of arbitrary values, as long as they fit in
           memory card space.
+          Returns a bytearray, to avoid copying the whole result once more.
         """
-        card_type = self.getCardType()
-        if card_type == 1:
-            read = self.readFrame
-        elif card_type == 2:
-            read = self.readPage
-        else:
-            raise ValueError('No/unknown card (%02x)' % (card_type, ))
-        block_length = self._getPageSize(card_type)
-        max_length = self._getSize(card_type)
+        result = bytearray(length)
+        result_view = memoryview(result)
+        for data_offset, data in self.readIter(offset, length):
+            data_offset -= offset
+            result_view[data_offset:data_offset + len(data)] = data
+        return result
+
+    def readIter(self, offset, length):
+        """
+          Same as read, but return an iterator over (offset, data) tuples,
+          each produced as soon as the underlying block (or batch of blocks)
+          is read, so caller can process data while next blocks are read.
+          data is trimmed to requested range.
+        """
+        read, read_multiple, _, block_length, max_length = self._getIOProfile()
         if offset + length > max_length:
             raise ValueError('Trying to read out of card.')
-        result = []
-        append = result.append
+        return self._readIter(offset, length, read, read_multiple,
+          block_length)
+
+    @staticmethod
+    def _readIter(offset, length, read, read_multiple, block_length):
         current_block, start_offset = divmod(offset, block_length)
-        result_len = -start_offset
-        while result_len < length:
-            data = read(current_block)
-            assert len(data) == block_length, len(data)
-            result_len += block_length
-            append(data)
+        if start_offset:
+            head_length = min(block_length - start_offset, length)
+            yield offset, memoryview(read(current_block))[start_offset:
+              start_offset + head_length]
+            offset += head_length
+            length -= head_length
             current_block += 1
-        result[0] = result[0][start_offset:]
-        if result_len > length:
-            result[-1] = result[-1][:length - result_len]
-        return b''.join(result)
+        block_count, tail_length = divmod(length, block_length)
+        tail_block = current_block + block_count
+        if read_multiple is None or block_count < 2:
+            for block in range(current_block, tail_block):
+                yield offset, read(block)
+                offset += block_length
+        else:
+            for block in range(current_block, tail_block,
+                  PAGE_READ_BATCH_SIZE):
+                count = min(PAGE_READ_BATCH_SIZE, tail_block - block)
+                yield offset, read_multiple(block, count)
+                offset += count * block_length
+        if tail_length:
+            yield offset, memoryview(read(tail_block))[:tail_length]
 
     def write(self, offset, data):
         """
@@ -340,43 +659,41 @@ class PlayStationMemoryCardReader(object):
           memory card space. This function will take care reading existing block
           data if write does not start and/or stop on an underlying block boundary.
         """
-        card_type = self.getCardType()
-        if card_type == 1:
-            read = self.readFrame
-            write = self.writeFrame
-        elif card_type == 2:
-            read = self.readPage
-            write = self.writePage
-        else:
-            raise ValueError('No/unknown card (%02x)' % (card_type, ))
-        block_length = self._getPageSize(card_type)
-        max_length = self._getSize(card_type)
+        read, _, write, block_length, max_length = self._getIOProfile()
         if offset + len(data) > max_length:
             raise ValueError('Trying to write out of card.')
+        data = memoryview(data)
+        data_len = len(data)
         current_block, start_offset = divmod(offset, block_length)
+        pos = 0
         if start_offset:
-            data = read(current_block)[:start_offset] + data
-        while len(data) >= block_length:
-            to_write, data = data[:block_length], data[block_length:]
-            write(current_block, to_write)
+            block = bytearray(read(current_block))
+            pos = min(block_length - start_offset, data_len)
+            block[start_offset:start_offset + pos] = data[:pos]
+            write(current_block, block)
             current_block += 1
-        data_len = len(data)
-        if data_len:
-            write(current_block, data + read(current_block)[data_len:])
+        while data_len - pos >= block_length:
+            next_pos = pos + block_length
+            write(current_block, data[pos:next_pos])
+            pos = next_pos
+            current_block += 1
+        if pos < data_len:
+            tail = data[pos:]
+            write(current_block, bytes(tail) + read(current_block)[len(tail):])
 
     @staticmethod
     def _getSize(card_type):
         return CARD_SIZE_DICT.get(card_type)
 
     def getSize(self):
-        return self._getSize(self.getCardType())
+        return self._getSize(self.cardType)
 
     @staticmethod
     def _getPageSize(card_type):
         return CARD_PAGE_DICT.get(card_type)
 
     def getPageSize(self):
-        return self._getPageSize(self.getCardType())
+        return self._getPageSize(self.cardType)
 
     # Authentication
     def authenticate(self):
@@ -406,15 +723,21 @@ class PlayStationMemoryCardReader(object):
             auth success.
           - Sadly, the PRNG is seeded upon replugging, so it's not possible to
             go off with a 2-entry rainbow table.
+
+          Once authenticated, card reader is only asked again every
+          AUTH_CHECK_INTERVAL calls, or after invalidateAuthentication.
         """
+        if self._authenticated_countdown:
+            self._authenticated_countdown -= 1
+            return
         while not self.isAuthenticated():
             # ?
             self.__81f3()
             self.__81f7()
             self.__81f0(0)
             # card reader serial ?
-            self.__recv_81f0(1, 9)
-            self.__recv_81f0(2, 9)
+            self.__recv_81f0(1)
+            self.__recv_81f0(2)
             # ?
             self.__81f0(3)
             # Random value
@@ -422,7 +745,7 @@ class PlayStationMemoryCardReader(object):
             answer_list = self._authenticator.authenticate(seed)
             # ?
             if not self.__81f0(5):
-                print('Auth timeout, retrying...')
+                _log.warning('Auth timeout, retrying...')
                 continue
             # First answer
             self.sendAuthPart1(answer_list[0])
@@ -453,3 +776,11 @@ class PlayStationMemoryCardReader(object):
             if not self.isAuthenticated():
                 raise ValueError('Authentication went to the end, but we ' \
                   'are not authenticated !')
+        self._authenticated_countdown = AUTH_CHECK_INTERVAL
+
+    def invalidateAuthentication(self):
+        """
+          Forget authentication state, so card reader is asked again on next
+          PS2 page access.
+        """
+        self._authenticated_countdown = 0
@@ -1,6 +1,8 @@
 import errno
+import queue
 import socket
 import struct
+import threading
 from traceback import print_exc
 
 NBD_GREETING_SUFFIX     = b'\0' * 124
@@ -110,6 +112,7 @@ NBD_INFO_BLOCK_SIZE     = 3
 
 MAX_OPT_SIZE    = 2**10 # way over any standard OPT request's payload length
 MAX_BLOCK_SIZE  = 2**25 # 32M, value recommended in spec
+READ_QUEUE_DEPTH = 8 # device data chunks read ahead of socket
 
 COMMAND_ALLOWED_FLAG_DICT = {
     NBD_CMD_READ:           NBD_CMD_FLAG_FUA | NBD_CMD_FLAG_DF,
@@ -142,6 +145,11 @@ class NBDServer(object):
                 Write <data> starting at <offset>.
               read(offset, length) -> string
                 Read <length> bytes starting at <offset>.
+            and optionally:
+              readIter(offset, length) -> iterator of (offset, string)
+                Same as read, but producing data as it gets read. When
+                available, read replies are sent while device is still
+                reading.
           read_only (bool)
             Whether the device should be advertised as allowing writes.
             This is enforced within this class, so that a client ignoring this
@@ -154,6 +162,7 @@ class NBDServer(object):
         self._buffer_view = memoryview(buffer)
         self._buffer_len = 0
         self._buffer_target = None
+        self._readIter = getattr(device, 'readIter', None)
 
     def fileno(self):
         return self._sock.fileno()
@@ -338,6 +347,60 @@ class NBDServer(object):
         if data:
             self._sock.sendall(data)
 
+    def _streamRead(self, handle, offset, length):
+        """
+          Reply to a read request while device is still reading: a thread
+          iterates over device data, queueing it for socket sends.
+          Simple replies cannot report an error once data was sent, so on
+          failure past the first chunk the connection is closed, as mandated
+          by NBD spec.
+
+          Return value: same as handle.
+        """
+        chunk_queue = queue.Queue(READ_QUEUE_DEPTH)
+        put = chunk_queue.put
+        get = chunk_queue.get
+        stop = threading.Event()
+        def produce():
+            try:
+                for _, data in self._readIter(offset, length):
+                    put(data)
+                    if stop.is_set():
+                        return
+            except Exception:
+                print_exc()
+                put(None)
+            else:
+                put(b'')
+        thread = threading.Thread(target=produce)
+        thread.daemon = True
+        thread.start()
+        data = get()
+        try:
+            if data is None:
+                self._simpleReply(handle, error=NBD_EIO)
+                return True
+            self._simpleReply(handle)
+            sent = 0
+            while data:
+                self._sock.sendall(data)
+                sent += len(data)
+                data = get()
+            if data is None or sent != length:
+                self.close()
+                return False
+            return True
+        finally:
+            # Should socket have failed mid-reply, stop producer without
+            # waiting for it to read the whole request from the card: make
+            # room in queue in case it is blocked on it, until it notices.
+            stop.set()
+            while thread.is_alive():
+                try:
+                    chunk_queue.get_nowait()
+                except queue.Empty:
+                    thread.join(0.01)
+
     def handle(self):
         """
           To be called upon incomming data on socket.
@@ -376,6 +439,8 @@ class NBDServer(object):
                 error = NBD_ENOTSUP
             elif length > MAX_BLOCK_SIZE:
                 error = NBD_EINVAL
+            elif length and self._readIter is not None:
+                return self._streamRead(handle, offset, length)
             elif length:
                 try:
                     data = self._device.read(offset, length)